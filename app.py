@@ -1,14 +1,21 @@
 import asyncio
 import logging
 import os
+import threading
 from pathlib import Path
 
-from flask import Flask, render_template, request, redirect, url_for, jsonify
-from apscheduler.schedulers.background import BackgroundScheduler
+import orjson
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+try:
+    import uvloop
+except ImportError:  # uvloop is unavailable on Windows
+    uvloop = None
 
 from db import AlertDB
-from scraper import scrape_best_prices, scrape_preispirat_rss
-from notifier import send_telegram_alert
+from scraper import format_product, scrape_all
+from notifier import alert_worker, get_bot
 
 # --- Logging ---
 logging.basicConfig(
@@ -24,13 +31,24 @@ app = Flask(__name__)
 db = AlertDB(os.environ.get("DB_PATH", str(BASE_DIR / "price_alerts.db")))
 db.seed_from_config()
 
-scheduler = BackgroundScheduler(daemon=True)
+# One long-lived event loop in a daemon thread runs the scheduler, scans and
+# Telegram calls, instead of a fresh asyncio.run() loop per call.
+loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+threading.Thread(target=loop.run_forever, name="scan-loop", daemon=True).start()
+
+scheduler = AsyncIOScheduler(event_loop=loop)
+
+# Scans hand alerts to a single background sender instead of awaiting the
+# Telegram round-trips themselves; the bound applies backpressure.
+alert_queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+asyncio.run_coroutine_threadsafe(alert_worker(alert_queue), loop)
+
 SCAN_JOB_ID = "price_scan"
 FAMILY_MEMBERS = ["조성현", "이진경", "조예나"]
 
 # --- Scan logic ---
 
-def scan_job():
+async def scan_job():
     """Run one scrape-filter-notify cycle using DB rules and settings."""
     logger.info("=== Starting scan ===")
 
@@ -44,45 +62,41 @@ def scan_job():
     bot_token = db.get_setting("telegram_bot_token")
     chat_id = db.get_setting("telegram_chat_id")
 
-    # Run async scraper in a new event loop
-    try:
-        products = asyncio.run(scrape_best_prices(url=url, rules=rules))
-    except Exception as e:
-        logger.error("Scraping failed: %s", e)
-        products = []
+    # Drop expired alerts first so they neither get skipped nor block re-alerts
+    db.cleanup_old(hours=24)
+    skip_keys = db.recent_alert_keys(hours=24)
 
-    # Preispirat RSS feed
-    try:
-        rss_products = asyncio.run(scrape_preispirat_rss(rules=rules))
-        products.extend(rss_products)
-    except Exception as e:
-        logger.warning("Preispirat RSS failed: %s", e)
+    # Toppreise page and Preispirat RSS feed, fetched concurrently
+    products = [format_product(p)
+                for p in await scrape_all(url, rules=rules, skip_keys=skip_keys)]
 
     if not products:
-        logger.info("No qualifying products found.")
+        logger.info("No new qualifying products found.")
         return
 
     logger.info("Found %d qualifying product(s)", len(products))
 
     # Deduplicate by (url, price) — keep first occurrence only
-    seen = set()
-    unique_products = []
+    unique = {}
     for p in products:
-        key = (p.get("url") or p["name"], p["new_price"])
-        if key not in seen:
-            seen.add(key)
-            unique_products.append(p)
-    products = unique_products
-
-    # Filter out already-alerted products
-    new_products = []
-    for p in products:
-        key_url = p.get("url") or p["name"]
-        key_price = p["new_price"]
-        if not db.already_alerted(key_url, key_price):
-            new_products.append(p)
-        else:
-            logger.debug("Already alerted: %s @ %s", p["name"], key_price)
+        unique.setdefault((p.get("url") or p["name"], p["new_price"]), p)
+    products = list(unique.values())
+
+    # Record alerts; the UNIQUE (url, price) index drops already-alerted ones
+    inserted = db.insert_if_new([
+        {
+            "product_url": p.get("url") or p["name"],
+            "price": p["new_price"],
+            "product_name": p["name"],
+            "discount": p["discount"],
+            "rule_id": p.get("matched_rule_id"),
+        }
+        for p in products
+    ])
+    new_products = [
+        p for p in products
+        if (p.get("url") or p["name"], p["new_price"]) in inserted
+    ]
 
     if not new_products:
         logger.info("All products already alerted. Nothing to send.")
@@ -90,28 +104,12 @@ def scan_job():
 
     logger.info("%d new product(s) to alert", len(new_products))
 
-    # Send Telegram notification
+    # Queue Telegram notification for the background sender
     if bot_token and chat_id:
-        try:
-            asyncio.run(send_telegram_alert(bot_token, chat_id, new_products))
-        except Exception as e:
-            logger.error("Failed to send Telegram alert: %s", e)
+        await alert_queue.put((bot_token, chat_id, new_products))
     else:
         logger.warning("Telegram not configured. Skipping notification.")
 
-    # Record alerts
-    for p in new_products:
-        key_url = p.get("url") or p["name"]
-        db.record_alert(
-            product_url=key_url,
-            price=p["new_price"],
-            product_name=p["name"],
-            discount=p["discount"],
-            rule_id=p.get("matched_rule_id"),
-        )
-
-    # Cleanup old records
-    db.cleanup_old(hours=24)
     logger.info("=== Scan complete ===")
 
 
@@ -222,13 +220,13 @@ def test_telegram():
     if not bot_token or not chat_id:
         return jsonify({"ok": False, "error": "텔레그램 설정이 없습니다."}), 400
 
-    from telegram import Bot
     try:
-        asyncio.run(
-            Bot(token=bot_token).send_message(
+        asyncio.run_coroutine_threadsafe(
+            get_bot(bot_token).send_message(
                 chat_id=chat_id, text="테스트 메시지입니다. 텔레그램 연동이 정상 작동합니다!"
-            )
-        )
+            ),
+            loop,
+        ).result(timeout=60)
         return jsonify({"ok": True})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
@@ -246,18 +244,26 @@ def monitor_stop():
     return redirect(url_for("index"))
 
 
+def _log_scan_failure(fut):
+    if fut.cancelled():
+        return
+    exc = fut.exception()
+    if exc is not None:
+        logger.error("Manual scan failed", exc_info=exc)
+
+
 @app.route("/monitor/run-now", methods=["POST"])
 def monitor_run_now():
-    import threading
-    t = threading.Thread(target=scan_job, daemon=True)
-    t.start()
+    fut = asyncio.run_coroutine_threadsafe(scan_job(), loop)
+    fut.add_done_callback(_log_scan_failure)
     return redirect(url_for("index"))
 
 
 @app.route("/history")
 def history_json():
     limit = request.args.get("limit", 50, type=int)
-    return jsonify(db.get_alert_history(limit=limit))
+    return Response(orjson.dumps(db.get_alert_history(limit=limit)),
+                    mimetype="application/json")
 
 
 if __name__ == "__main__":
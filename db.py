@@ -1,64 +1,126 @@
+import itertools
 import os
 import sqlite3
 import logging
-from datetime import datetime, timedelta
+import threading
+import time
 from pathlib import Path
 
 import yaml
 
 logger = logging.getLogger(__name__)
 
+ANALYZE_INTERVAL_SECONDS = 24 * 60 * 60
+HISTORY_CACHE_SIZE = 8
+# Bump when _create_schema changes so existing databases re-run it
+SCHEMA_VERSION = 1
+
+# update_rule statements for every combination of (value, min_discount_percent,
+# category) being set, built once so each call is a dict lookup.
+_UPDATE_RULE_COLUMNS = ("value", "min_discount_percent", "category")
+_UPDATE_RULE_SQL = {
+    mask: "UPDATE watch_rules SET {} WHERE id = ?".format(
+        ", ".join(f"{col} = ?" for col, on in zip(_UPDATE_RULE_COLUMNS, mask) if on)
+    )
+    for mask in itertools.product((False, True), repeat=len(_UPDATE_RULE_COLUMNS))
+    if any(mask)
+}
+
+
+def _dict_rows(cursor: sqlite3.Cursor) -> list[dict]:
+    """Build row dicts straight from tuples, named by the cursor's columns."""
+    cols = [d[0] for d in cursor.description]
+    return [dict(zip(cols, r)) for r in cursor]
+
 
 class AlertDB:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self._local = threading.local()
+        self._last_analyze: float | None = None
+        # In-process caches for rarely-changing config; writers invalidate
+        # them and bump the version so an in-flight read can't store stale data.
+        self._cache_lock = threading.Lock()
+        self._settings_cache: dict[str, str] | None = None
+        self._settings_cache_version = 0
+        self._rules_cache: list[dict] | None = None
+        self._rules_cache_version = 0
+        self._history_cache: dict[int, list[dict]] = {}
+        self._history_cache_version = 0
         self._init_db()
 
     def _conn(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON")
+        """Return this thread's long-lived connection, opening it on first use.
+
+        Reuse pays off on long-lived threads such as the scan loop; Werkzeug
+        starts a thread per request, so Flask routes still open one each. Only
+        per-connection PRAGMAs belong here. `with conn:` still scopes a
+        transaction without closing it.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute("PRAGMA mmap_size = 67108864")
+            conn.execute("PRAGMA cache_size = -20000")
+            self._local.conn = conn
         return conn
 
     def _init_db(self):
         with self._conn() as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS alert_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_url TEXT NOT NULL,
-                    price TEXT NOT NULL,
-                    product_name TEXT DEFAULT '',
-                    discount TEXT DEFAULT '',
-                    rule_id INTEGER,
-                    alerted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_url_price
-                ON alert_history (product_url, price)
-            """)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS watch_rules (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    rule_type TEXT NOT NULL CHECK(rule_type IN ('brand', 'keyword')),
-                    value TEXT NOT NULL,
-                    min_discount_percent REAL NOT NULL DEFAULT 20,
-                    enabled INTEGER NOT NULL DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS settings (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL
-                )
-            """)
-            # Migrate: add columns to alert_history if missing
-            self._migrate_alert_history(conn)
-            self._migrate_watch_rules(conn)
-            conn.commit()
+            # Stored in the database file, so set once here rather than per
+            # connection. auto_vacuum only takes effect on a fresh file, so it
+            # must come before the WAL switch writes the header.
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode = WAL")
+            # Warm starts skip table creation and migration introspection
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < SCHEMA_VERSION:
+                self._create_schema(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                conn.commit()
+            conn.execute("PRAGMA optimize")
         logger.info("Database initialized: %s", self.db_path)
 
+    def _create_schema(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS alert_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_url TEXT NOT NULL,
+                price TEXT NOT NULL,
+                product_name TEXT DEFAULT '',
+                discount TEXT DEFAULT '',
+                rule_id INTEGER,
+                alerted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS watch_rules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                rule_type TEXT NOT NULL CHECK(rule_type IN ('brand', 'keyword')),
+                value TEXT NOT NULL,
+                min_discount_percent REAL NOT NULL DEFAULT 20,
+                enabled INTEGER NOT NULL DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        # Migrate: add columns to alert_history if missing
+        self._migrate_alert_history(conn)
+        self._migrate_watch_rules(conn)
+        self._migrate_alert_unique_index(conn)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_alerted_at
+            ON alert_history (alerted_at)
+        """)
+
     def _migrate_alert_history(self, conn):
         cursor = conn.execute("PRAGMA table_info(alert_history)")
         columns = {row[1] for row in cursor.fetchall()}
@@ -75,68 +137,191 @@ class AlertDB:
         if "category" not in columns:
             conn.execute("ALTER TABLE watch_rules ADD COLUMN category TEXT NOT NULL DEFAULT '조성현'")
 
+    def _migrate_alert_unique_index(self, conn):
+        """Replace the plain (url, price) index with a UNIQUE one so inserts can dedup."""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'uq_url_price'"
+        ).fetchone()
+        if exists:
+            return
+        conn.execute("""
+            DELETE FROM alert_history WHERE id NOT IN (
+                SELECT MIN(id) FROM alert_history GROUP BY product_url, price
+            )
+        """)
+        conn.execute("DROP INDEX IF EXISTS idx_url_price")
+        conn.execute("""
+            CREATE UNIQUE INDEX uq_url_price
+            ON alert_history (product_url, price)
+        """)
+
     # --- Alert History ---
 
-    def already_alerted(self, product_url: str, price: str) -> bool:
+    def filter_unalerted(self, pairs: list[tuple[str, str]]) -> set[tuple[str, str]]:
+        """Return the subset of (product_url, price) pairs already alerted."""
+        alerted = set()
+        if not pairs:
+            return alerted
+        # SQLite caps bound parameters at 999 — two per pair
+        chunk_size = 999 // 2
         with self._conn() as conn:
-            row = conn.execute(
-                "SELECT 1 FROM alert_history WHERE product_url = ? AND price = ?",
-                (product_url, price),
-            ).fetchone()
-        return row is not None
-
-    def record_alert(self, product_url: str, price: str,
-                     product_name: str = "", discount: str = "",
-                     rule_id: int | None = None):
+            for i in range(0, len(pairs), chunk_size):
+                chunk = pairs[i:i + chunk_size]
+                values = ", ".join(["(?, ?)"] * len(chunk))
+                params = [v for pair in chunk for v in pair]
+                rows = conn.execute(
+                    f"""SELECT product_url, price FROM alert_history
+                        WHERE (product_url, price) IN (VALUES {values})""",
+                    params,
+                ).fetchall()
+                alerted.update(rows)
+        return alerted
+
+    def recent_alert_keys(self, hours: int = 24) -> set[tuple[str, str]]:
+        """Return every (product_url, price) alerted within the last `hours`."""
         with self._conn() as conn:
-            conn.execute(
+            rows = conn.execute(
+                """SELECT product_url, price FROM alert_history
+                   WHERE alerted_at >= datetime('now', ?)""",
+                (f"-{hours} hours",),
+            ).fetchall()
+        return set(rows)
+
+    def record_alerts(self, rows: list[dict]):
+        """Insert many alerts in a single transaction.
+
+        Each row needs product_url and price; product_name, discount and
+        rule_id are optional.
+        """
+        if not rows:
+            return
+        params = [
+            {
+                "product_url": r["product_url"],
+                "price": r["price"],
+                "product_name": r.get("product_name", ""),
+                "discount": r.get("discount", ""),
+                "rule_id": r.get("rule_id"),
+            }
+            for r in rows
+        ]
+        with self._conn() as conn:
+            conn.executemany(
                 """INSERT INTO alert_history
                    (product_url, price, product_name, discount, rule_id)
-                   VALUES (?, ?, ?, ?, ?)""",
-                (product_url, price, product_name, discount, rule_id),
+                   VALUES (:product_url, :price, :product_name, :discount, :rule_id)
+                   ON CONFLICT (product_url, price) DO NOTHING""",
+                params,
             )
             conn.commit()
-        logger.debug("Alert recorded: %s @ %s", product_url, price)
+        self._invalidate_history()
+        logger.debug("Recorded %d alert(s)", len(params))
+
+    def insert_if_new(self, rows: list[dict]) -> set[tuple[str, str]]:
+        """Record alerts not seen before; return the (product_url, price) keys inserted.
+
+        Dedup is done by the UNIQUE (product_url, price) index, so no separate
+        lookup is needed. All rows go in one transaction.
+        """
+        inserted = set()
+        if not rows:
+            return inserted
+        with self._conn() as conn:
+            for r in rows:
+                row = conn.execute(
+                    """INSERT INTO alert_history
+                       (product_url, price, product_name, discount, rule_id)
+                       VALUES (?, ?, ?, ?, ?)
+                       ON CONFLICT (product_url, price) DO NOTHING
+                       RETURNING id""",
+                    (r["product_url"], r["price"], r.get("product_name", ""),
+                     r.get("discount", ""), r.get("rule_id")),
+                ).fetchone()
+                if row is not None:
+                    inserted.add((r["product_url"], r["price"]))
+            conn.commit()
+        if inserted:
+            self._invalidate_history()
+        logger.debug("Inserted %d of %d alert(s)", len(inserted), len(rows))
+        return inserted
 
     def cleanup_old(self, hours: int = 24):
-        cutoff = datetime.utcnow() - timedelta(hours=hours)
         with self._conn() as conn:
             result = conn.execute(
-                "DELETE FROM alert_history WHERE alerted_at < ?",
-                (cutoff.isoformat(),),
+                "DELETE FROM alert_history WHERE alerted_at < datetime('now', ?)",
+                (f"-{hours} hours",),
             )
             conn.commit()
         deleted = result.rowcount
         if deleted > 0:
+            # execute() only frees one page per step; executescript runs the
+            # pragma to completion (it commits first, so stay outside `with`)
+            self._conn().executescript("PRAGMA incremental_vacuum;")
+            self._invalidate_history()
             logger.info("Cleaned up %d old alert records", deleted)
+            # Refresh planner stats for the dedup index at most once a day
+            now = time.monotonic()
+            if (self._last_analyze is None
+                    or now - self._last_analyze >= ANALYZE_INTERVAL_SECONDS):
+                self._last_analyze = now
+                with self._conn() as conn:
+                    conn.execute("ANALYZE alert_history")
+                    conn.commit()
 
     def get_alert_history(self, limit: int = 50) -> list[dict]:
+        with self._cache_lock:
+            cached = self._history_cache.get(limit)
+            if cached is not None:
+                return list(cached)
+            version = self._history_cache_version
         with self._conn() as conn:
-            rows = conn.execute(
+            history = _dict_rows(conn.execute(
                 """SELECT id, product_url, price, product_name, discount,
                           rule_id, alerted_at
                    FROM alert_history
                    ORDER BY alerted_at DESC
                    LIMIT ?""",
                 (limit,),
-            ).fetchall()
-        return [dict(r) for r in rows]
+            ))
+        with self._cache_lock:
+            if version == self._history_cache_version:
+                # Keep only a few page sizes; /history takes arbitrary limits
+                if len(self._history_cache) >= HISTORY_CACHE_SIZE:
+                    self._history_cache.clear()
+                self._history_cache[limit] = history
+        return list(history)
+
+    def _invalidate_history(self):
+        with self._cache_lock:
+            self._history_cache.clear()
+            self._history_cache_version += 1
 
     # --- Watch Rules ---
 
     def get_all_rules(self) -> list[dict]:
         with self._conn() as conn:
-            rows = conn.execute(
+            return _dict_rows(conn.execute(
                 "SELECT * FROM watch_rules ORDER BY created_at DESC"
-            ).fetchall()
-        return [dict(r) for r in rows]
+            ))
 
     def get_enabled_rules(self) -> list[dict]:
+        with self._cache_lock:
+            if self._rules_cache is not None:
+                return list(self._rules_cache)
+            version = self._rules_cache_version
         with self._conn() as conn:
-            rows = conn.execute(
+            rules = _dict_rows(conn.execute(
                 "SELECT * FROM watch_rules WHERE enabled = 1 ORDER BY id"
-            ).fetchall()
-        return [dict(r) for r in rows]
+            ))
+        with self._cache_lock:
+            if version == self._rules_cache_version:
+                self._rules_cache = rules
+        return list(rules)
+
+    def _invalidate_rules(self):
+        with self._cache_lock:
+            self._rules_cache = None
+            self._rules_cache_version += 1
 
     def add_rule(self, rule_type: str, value: str,
                  min_discount_percent: float = 20,
@@ -148,12 +333,14 @@ class AlertDB:
                 (rule_type, value, min_discount_percent, category),
             )
             conn.commit()
-            return cursor.lastrowid
+        self._invalidate_rules()
+        return cursor.lastrowid
 
     def delete_rule(self, rule_id: int):
         with self._conn() as conn:
             conn.execute("DELETE FROM watch_rules WHERE id = ?", (rule_id,))
             conn.commit()
+        self._invalidate_rules()
 
     def toggle_rule(self, rule_id: int):
         with self._conn() as conn:
@@ -162,39 +349,26 @@ class AlertDB:
                 (rule_id,),
             )
             conn.commit()
+        self._invalidate_rules()
 
     def update_rule(self, rule_id: int, value: str | None = None,
                     min_discount_percent: float | None = None,
                     category: str | None = None):
-        updates = []
-        params = []
-        if value is not None:
-            updates.append("value = ?")
-            params.append(value)
-        if min_discount_percent is not None:
-            updates.append("min_discount_percent = ?")
-            params.append(min_discount_percent)
-        if category is not None:
-            updates.append("category = ?")
-            params.append(category)
-        if not updates:
+        fields = (value, min_discount_percent, category)
+        sql = _UPDATE_RULE_SQL.get(tuple(f is not None for f in fields))
+        if sql is None:
             return
+        params = [f for f in fields if f is not None]
         params.append(rule_id)
         with self._conn() as conn:
-            conn.execute(
-                f"UPDATE watch_rules SET {', '.join(updates)} WHERE id = ?",
-                params,
-            )
+            conn.execute(sql, params)
             conn.commit()
+        self._invalidate_rules()
 
     # --- Settings ---
 
     def get_setting(self, key: str, default: str = "") -> str:
-        with self._conn() as conn:
-            row = conn.execute(
-                "SELECT value FROM settings WHERE key = ?", (key,)
-            ).fetchone()
-        return row["value"] if row else default
+        return self._settings().get(key, default)
 
     def set_setting(self, key: str, value: str):
         with self._conn() as conn:
@@ -203,11 +377,25 @@ class AlertDB:
                 (key, value),
             )
             conn.commit()
+        with self._cache_lock:
+            self._settings_cache = None
+            self._settings_cache_version += 1
 
     def get_all_settings(self) -> dict[str, str]:
+        return dict(self._settings())
+
+    def _settings(self) -> dict[str, str]:
+        """Return the cached settings dict, loading it on first use."""
+        with self._cache_lock:
+            if self._settings_cache is not None:
+                return self._settings_cache
+            version = self._settings_cache_version
         with self._conn() as conn:
-            rows = conn.execute("SELECT key, value FROM settings").fetchall()
-        return {r["key"]: r["value"] for r in rows}
+            settings = dict(conn.execute("SELECT key, value FROM settings"))
+        with self._cache_lock:
+            if version == self._settings_cache_version:
+                self._settings_cache = settings
+        return settings
 
     # --- Seed from config.yaml ---
 
@@ -7,7 +7,12 @@ from pathlib import Path
 import yaml
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from scraper import scrape_best_prices
+try:
+    import uvloop
+except ImportError:  # uvloop is unavailable on Windows
+    uvloop = None
+
+from scraper import close_browser, format_product, scrape_best_prices
 from notifier import send_telegram_alert
 from db import AlertDB
 
@@ -49,16 +54,23 @@ async def run_scan(config: dict, db: AlertDB):
         return
 
     logger.info("Found %d qualifying product(s)", len(products))
+    products = [format_product(p) for p in products]
 
-    # 2. Filter out already-alerted products
-    new_products = []
+    # Deduplicate by (url, price) — keep first occurrence only
+    unique = {}
     for p in products:
-        key_url = p.get("url") or p["name"]
-        key_price = p["new_price"]
-        if not db.already_alerted(key_url, key_price):
+        unique.setdefault((p.get("url") or p["name"], p["new_price"]), p)
+    products = list(unique.values())
+
+    # 2. Filter out already-alerted products (single batched lookup)
+    keys = [(p.get("url") or p["name"], p["new_price"]) for p in products]
+    alerted = db.filter_unalerted(keys)
+    new_products = []
+    for key, p in zip(keys, products):
+        if key not in alerted:
             new_products.append(p)
         else:
-            logger.debug("Already alerted: %s @ %s", p["name"], key_price)
+            logger.debug("Already alerted: %s @ %s", p["name"], key[1])
 
     if not new_products:
         logger.info("All products already alerted. Nothing to send.")
@@ -74,9 +86,10 @@ async def run_scan(config: dict, db: AlertDB):
         return
 
     # 4. Record alerts
-    for p in new_products:
-        key_url = p.get("url") or p["name"]
-        db.record_alert(key_url, p["new_price"])
+    db.record_alerts([
+        {"product_url": p.get("url") or p["name"], "price": p["new_price"]}
+        for p in new_products
+    ])
 
     # 5. Cleanup old records
     db.cleanup_old(hours=24)
@@ -130,11 +143,12 @@ async def main():
 
     await stop_event.wait()
     scheduler.shutdown(wait=False)
+    await close_browser()
     logger.info("Goodbye!")
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        (uvloop.run if uvloop else asyncio.run)(main())
     except KeyboardInterrupt:
         pass
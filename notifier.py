@@ -1,49 +1,101 @@
+import asyncio
+import functools
 import logging
 from telegram import Bot
 from telegram.constants import ParseMode
+from telegram.error import RetryAfter
 
 logger = logging.getLogger(__name__)
 
+SEND_RETRIES = 3
+
+
+@functools.lru_cache(maxsize=4)
+def get_bot(token: str) -> Bot:
+    """Return a shared Bot per token so its HTTP connection pool survives across scans."""
+    return Bot(token=token)
+
+
+def _format_product(p: dict) -> str:
+    shop = f"\n🏪 {p['shop']}" if p.get("shop") else ""
+    link = f"\n🔗 <a href=\"{p['url']}\">제품 링크</a>" if p.get("url") else ""
+    return (
+        f"📱 <b>{p['name']}</b>\n"
+        f"💰 {p['old_price']} → {p['new_price']} ({p['discount']})"
+        f"{shop}{link}\n"
+    )
+
 
 def format_message(products: list[dict]) -> str:
-    lines = ["🔥 <b>최저가 할인 알림!</b>\n"]
+    parts = ["🔥 <b>최저가 할인 알림!</b>\n"]
+    parts.extend(_format_product(p) for p in products)
+    return "\n".join(parts)
 
-    for p in products:
-        lines.append(f"📱 <b>{p['name']}</b>")
-        lines.append(f"💰 {p['old_price']} → {p['new_price']} ({p['discount']})")
-        if p.get("shop"):
-            lines.append(f"🏪 {p['shop']}")
-        if p.get("url"):
-            lines.append(f"🔗 <a href=\"{p['url']}\">제품 링크</a>")
-        lines.append("")
 
-    return "\n".join(lines)
+async def _send(bot: Bot, chat_id: str, text: str):
+    """Send one message, waiting out Telegram flood control instead of dropping it."""
+    for attempt in range(SEND_RETRIES + 1):
+        try:
+            await bot.send_message(
+                chat_id=chat_id,
+                text=text,
+                parse_mode=ParseMode.HTML,
+                disable_web_page_preview=True,
+            )
+            return
+        except RetryAfter as e:
+            if attempt == SEND_RETRIES:
+                raise
+            delay = e.retry_after
+            if hasattr(delay, "total_seconds"):
+                delay = delay.total_seconds()
+            logger.warning("Telegram flood control, retrying in %ss", delay)
+            await asyncio.sleep(delay)
 
 
 async def send_telegram_alert(bot_token: str, chat_id: str, products: list[dict]):
     if not products:
         return
 
-    bot = Bot(token=bot_token)
+    bot = get_bot(bot_token)
     message = format_message(products)
 
     # Telegram 메시지 최대 길이 4096자 — 넘으면 분할 발송
     if len(message) <= 4096:
-        await bot.send_message(
-            chat_id=chat_id,
-            text=message,
-            parse_mode=ParseMode.HTML,
-            disable_web_page_preview=True,
-        )
+        await _send(bot, chat_id, message)
         logger.info("Telegram alert sent: %d product(s)", len(products))
     else:
-        # 제품별로 개별 발송
+        # 제품별로 개별 발송 — 같은 채팅이라 순서대로 보내고, 한도 초과 시 대기 후 재시도
+        sent = 0
         for p in products:
-            single_msg = format_message([p])
-            await bot.send_message(
-                chat_id=chat_id,
-                text=single_msg,
-                parse_mode=ParseMode.HTML,
-                disable_web_page_preview=True,
-            )
-        logger.info("Telegram alerts sent individually: %d message(s)", len(products))
+            try:
+                await _send(bot, chat_id, format_message([p]))
+                sent += 1
+            except Exception as e:
+                logger.error("Failed to send Telegram alert: %s", e)
+        logger.info("Telegram alerts sent individually: %d message(s)", sent)
+
+
+async def alert_worker(queue: asyncio.Queue):
+    """Long-lived consumer: send queued (bot_token, chat_id, products) alerts.
+
+    Everything already waiting in the queue is drained and merged per
+    destination, so back-to-back scans go out as one Telegram send.
+    """
+    while True:
+        batches = [await queue.get()]
+        while not queue.empty():
+            batches.append(queue.get_nowait())
+
+        merged: dict[tuple[str, str], list[dict]] = {}
+        for bot_token, chat_id, products in batches:
+            merged.setdefault((bot_token, chat_id), []).extend(products)
+
+        for (bot_token, chat_id), products in merged.items():
+            try:
+                await send_telegram_alert(bot_token, chat_id, products)
+            except Exception as e:
+                logger.error("Failed to send Telegram alert: %s", e)
+
+        for _ in batches:
+            queue.task_done()
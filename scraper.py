@@ -1,16 +1,64 @@
+import asyncio
 import logging
 import os
 import re
-import ssl
-import urllib.request
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
 
+import ahocorasick
 import feedparser
+import httpx
 from playwright.async_api import async_playwright
+from selectolax.lexbor import LexborHTMLParser
 
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://www.toppreise.ch"
+# Rule count from which _RuleMatcher switches to Aho-Corasick automata
+AHOCORASICK_MIN_RULES = 4
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Thousands separators and whitespace dropped from prices in one pass
+_PRICE_TRANS = str.maketrans("", "", "' ,\t\n\r\xa0")
+# Already-clean prices like "189.00" that can go straight to float()
+_PLAIN_PRICE_RE = re.compile(r'\d+(?:\.\d+)?')
+_BEI_RE = re.compile(r'\bbei\s+(.+)$', re.IGNORECASE)
+_PREIS_RE = re.compile(r'Preis:\s*CHF\s*([\d\'.,]+(?:-)?)')
+_ZWEITBESTER_RE = re.compile(r'Zweitbester\s+Preis:\s*CHF\s*([\d\'.,]+(?:-)?)')
+
+
+@dataclass(slots=True, frozen=True)
+class Product:
+    """One scraped deal; one record per matched rule."""
+    name: str
+    old_price: float | None
+    new_price: float | None
+    discount_pct: float
+    shop: str
+    url: str
+    matched_rule_id: int | None
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+# Rule matches per (url, old price, new price), reused across scrapes while the
+# rules are unchanged; most cards reappear run to run at the same prices.
+_SEEN: OrderedDict[tuple[str, float, float], list[tuple[int, float]]] = OrderedDict()
+_SEEN_RULES: list[tuple[int, str, str, float]] | None = None
+SEEN_CACHE_SIZE = 10_000
+
+# Same selectors as the rendered page; used for static and browser HTML alike
+_CARD_SELECTOR = "a.small-box2"
+_MFG_SELECTOR = ".product-manufacturer"
+_NAME_SELECTOR = ".product-name"
+_OLD_PRICE_SELECTOR = ".priceContainer.crossed .Plugin_Price"
+_NEW_PRICE_SELECTOR = ".priceContainer.productPrice .Plugin_Price"
 
 
 async def scrape_best_prices(
@@ -18,41 +66,255 @@ async def scrape_best_prices(
     rules: list[dict] | None = None,
     brand_filter: str = "",
     min_discount_percent: float = 20,
-) -> list[dict]:
+    skip_keys: set[tuple[str, str]] | None = None,
+) -> list[Product]:
     """
     Scrape toppreise.ch/new-best-prices for discounted products.
 
+    The page is fetched over plain HTTP and parsed with selectolax; Playwright is
+    only used when that yields no product cards (e.g. JS-rendered markup).
+
     Supports two modes:
       1. Multi-rule mode: pass `rules` (list of dicts with keys:
          id, rule_type, value, min_discount_percent).
       2. Legacy mode: pass brand_filter + min_discount_percent.
 
-    Returns a list of dicts with keys:
-        name, old_price, new_price, discount, shop, url, matched_rule_id
+    Cards whose (url, new_price) key is in `skip_keys` (already alerted)
+    are dropped before rule matching.
+
+    Returns a list of Product records with raw float prices; see
+    format_product for the display form.
     """
+    cards, html = await _fetch_http(url)
+    if not cards:
+        cards, html = await _fetch_browser(url)
+
+    global _SEEN_RULES
+    skip = _numeric_keys(skip_keys)
+    matcher = _RuleMatcher(_prepare_rules(rules))
+    if matcher.prepped != _SEEN_RULES:
+        _SEEN.clear()
+        _SEEN_RULES = matcher.prepped
+
     products = []
+    for card in cards:
+        try:
+            manufacturer = card["manufacturer"]
+            name = card["name"]
+            full_name = f"{manufacturer} {name}".strip() if name else manufacturer
+
+            if not full_name:
+                continue
+
+            # Product URL
+            href = card["href"]
+            product_url = f"{BASE_URL}{href}" if href and href.startswith("/") else (href or "")
+
+            # Old price (crossed out) and current price
+            old_price_val = _parse_price(card["old_price"]) if card["old_price"] else None
+            new_price_val = _parse_price(card["new_price"]) if card["new_price"] else None
+
+            if old_price_val is None or new_price_val is None:
+                continue
+            if old_price_val <= 0:
+                continue
+            if (product_url or full_name, new_price_val) in skip:
+                continue
+
+            # Calculate discount
+            discount_pct = ((old_price_val - new_price_val) / old_price_val) * 100
+
+            # Match against rules
+            if rules:
+                if discount_pct < matcher.min_discount:
+                    continue
+                seen_key = (product_url or full_name, old_price_val, new_price_val)
+                matched = _SEEN.get(seen_key)
+                if matched is None:
+                    matched = matcher.match(manufacturer.lower(), full_name.lower(),
+                                            discount_pct)
+                    _SEEN[seen_key] = matched
+                    if len(_SEEN) > SEEN_CACHE_SIZE:
+                        _SEEN.popitem(last=False)
+                else:
+                    _SEEN.move_to_end(seen_key)
+                if not matched:
+                    continue
+                for rule_id, rule_min in matched:
+                    products.append(Product(
+                        name=full_name,
+                        old_price=old_price_val,
+                        new_price=new_price_val,
+                        discount_pct=discount_pct,
+                        shop="",
+                        url=product_url,
+                        matched_rule_id=rule_id,
+                    ))
+            else:
+                # Legacy single-filter mode
+                if brand_filter and brand_filter.lower() not in manufacturer.lower():
+                    continue
+                if discount_pct < min_discount_percent:
+                    continue
+                products.append(Product(
+                    name=full_name,
+                    old_price=old_price_val,
+                    new_price=new_price_val,
+                    discount_pct=discount_pct,
+                    shop="",
+                    url=product_url,
+                    matched_rule_id=None,
+                ))
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Found: %s | CHF %.2f -> CHF %.2f (-%d%%)",
+                    full_name, old_price_val, new_price_val, int(discount_pct),
+                )
+
+        except Exception as e:
+            logger.debug("Error parsing card: %s", e)
+            continue
+
+    # Save debug HTML if no results found
+    if not products and html:
+        try:
+            data_dir = os.environ.get("DATA_DIR", "")
+            debug_path = str(Path(data_dir) / "debug_page.html") if data_dir else "debug_page.html"
+            # Off the event loop: the page can be several MB
+            await asyncio.to_thread(Path(debug_path).write_text, html, encoding="utf-8")
+            logger.info("Saved %s for selector tuning", debug_path)
+        except Exception:
+            pass
+
+    logger.info("Scraping complete: %d product(s) found%s", len(products),
+                f": {', '.join(p.name for p in products[:10])}" if products else "")
+    return products
+
+
+async def _fetch_http(url: str) -> tuple[list[dict], str]:
+    """Fetch the page without a browser and extract its product cards.
+
+    Returns (cards, html); cards is empty if the request fails or the markup
+    has no cards.
+    """
+    logger.info("Loading page: %s", url)
+    try:
+        async with httpx.AsyncClient(
+            http2=True,
+            timeout=30,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT, "Accept-Language": "de-CH"},
+        ) as client:
+            resp = await client.get(url)
+            resp.raise_for_status()
+    except Exception as e:
+        logger.warning("HTTP fetch failed: %s", e)
+        return [], ""
+
+    html = resp.text
+    cards = _parse_cards(html)
+    logger.info("Found %d product cards", len(cards))
+    return cards, html
+
+
+def _parse_cards(html: str) -> list[dict]:
+    """Extract raw card fields from the page markup with selectolax."""
+    tree = LexborHTMLParser(html)
+
+    def text(card, selector: str) -> str | None:
+        node = card.css_first(selector)
+        return " ".join(node.text(separator=" ").split()) if node is not None else None
+
+    return [
+        {
+            "manufacturer": text(card, _MFG_SELECTOR) or "",
+            "name": text(card, _NAME_SELECTOR) or "",
+            "href": card.attributes.get("href"),
+            "old_price": text(card, _OLD_PRICE_SELECTOR),
+            "new_price": text(card, _NEW_PRICE_SELECTOR),
+        }
+        for card in tree.css(_CARD_SELECTOR)
+    ]
+
+
+_BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet"}
+
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+# Warm browser shared across scrapes, created lazily on first use. Playwright
+# objects are bound to the event loop that created them, hence _BROWSER_LOOP.
+_PW = None
+_BROWSER = None
+_CONTEXT = None
+_BROWSER_LOOP: int | None = None
+_BROWSER_LOCK: asyncio.Lock | None = None
+
+
+async def _get_context():
+    """Return the shared browser context, launching Chromium if needed."""
+    global _PW, _BROWSER, _CONTEXT, _BROWSER_LOOP, _BROWSER_LOCK
+
+    loop_id = id(asyncio.get_running_loop())
+    if _BROWSER_LOOP != loop_id:
+        _PW = _BROWSER = _CONTEXT = None
+        _BROWSER_LOOP = loop_id
+        _BROWSER_LOCK = asyncio.Lock()
+
+    async with _BROWSER_LOCK:
+        if _CONTEXT is None or not _BROWSER.is_connected():
+            if _PW is None:
+                _PW = await async_playwright().start()
+            _BROWSER = await _PW.chromium.launch(headless=True)
+            _CONTEXT = await _BROWSER.new_context(
+                user_agent=USER_AGENT,
+                locale="de-CH",
+            )
+            # Card data is read from the DOM source, so no styling or media is needed
+            await _CONTEXT.route("**/*", _block_heavy_resources)
+    return _CONTEXT
 
-    async with async_playwright() as pw:
-        browser = await pw.chromium.launch(headless=True)
-        context = await browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-            locale="de-CH",
-        )
-        page = await context.new_page()
-
-        logger.info("Loading page: %s", url)
+
+async def close_browser():
+    """Shut down the shared browser, if one was started on this loop."""
+    global _PW, _BROWSER, _CONTEXT, _BROWSER_LOOP
+    if _BROWSER_LOOP != id(asyncio.get_running_loop()):
+        return
+    try:
+        if _BROWSER is not None:
+            await _BROWSER.close()
+        if _PW is not None:
+            await _PW.stop()
+    finally:
+        _PW = _BROWSER = _CONTEXT = None
+        _BROWSER_LOOP = None
+
+
+async def _fetch_browser(url: str) -> tuple[list[dict], str]:
+    """Fallback: render the page in headless Chromium and extract its cards."""
+    logger.info("No cards in static HTML, loading page in browser: %s", url)
+    cards = []
+
+    context = await _get_context()
+    page = await context.new_page()
+    try:
         try:
-            await page.goto(url, wait_until="networkidle", timeout=30000)
+            await page.goto(url, wait_until="domcontentloaded", timeout=30000)
         except Exception as e:
             logger.error("Failed to load page: %s", e)
-            await browser.close()
-            return products
+            return cards, ""
 
-        await page.wait_for_timeout(2000)
+        # Return as soon as the cards exist instead of waiting for network idle
+        try:
+            await page.wait_for_selector(_CARD_SELECTOR, state="attached", timeout=10000)
+        except Exception as e:
+            logger.warning("No product cards appeared: %s", e)
 
         # Accept cookie consent if present
         try:
@@ -68,134 +330,122 @@ async def scrape_best_prices(
         except Exception:
             pass
 
-        # --- Scrape product cards ---
-        cards = await page.query_selector_all("a.small-box2")
+        # --- Scrape product cards from the rendered DOM, parsed locally ---
+        html = await page.content()
+        cards = _parse_cards(html)
         logger.info("Found %d product cards", len(cards))
+    finally:
+        await page.close()
 
-        for card in cards:
-            try:
-                # Manufacturer
-                mfg_el = await card.query_selector(".product-manufacturer")
-                manufacturer = (await mfg_el.inner_text()).strip() if mfg_el else ""
+    return cards, html
 
-                # Product name
-                name_el = await card.query_selector(".product-name")
-                name = (await name_el.inner_text()).strip() if name_el else ""
-                full_name = f"{manufacturer} {name}".strip() if name else manufacturer
 
-                if not full_name:
-                    continue
+def format_product(p: Product) -> dict:
+    """Return a scraped product as a dict with prices/discount as display strings.
 
-                # Product URL
-                href = await card.get_attribute("href")
-                product_url = f"{BASE_URL}{href}" if href and href.startswith("/") else (href or "")
-
-                # Old price (crossed out)
-                old_price_val = None
-                old_price_el = await card.query_selector(".priceContainer.crossed .Plugin_Price")
-                if old_price_el:
-                    old_price_text = (await old_price_el.inner_text()).strip()
-                    old_price_val = _parse_price(old_price_text)
-
-                # Current price
-                new_price_val = None
-                new_price_el = await card.query_selector(".priceContainer.productPrice .Plugin_Price")
-                if new_price_el:
-                    new_price_text = (await new_price_el.inner_text()).strip()
-                    new_price_val = _parse_price(new_price_text)
-
-                if old_price_val is None or new_price_val is None:
-                    continue
-                if old_price_val <= 0:
-                    continue
+    The strings double as the alert-history key, e.g. new_price "CHF 1,299.00".
+    """
+    return {
+        **p.to_dict(),
+        "old_price": f"CHF {p.old_price:,.2f}" if p.old_price else "",
+        "new_price": f"CHF {p.new_price:,.2f}" if p.new_price else "",
+        "discount": f"-{p.discount_pct:.0f}%" if p.discount_pct > 0 else "",
+    }
 
-                # Calculate discount
-                discount_pct = ((old_price_val - new_price_val) / old_price_val) * 100
-
-                # Match against rules
-                if rules:
-                    matched = _match_rules(manufacturer, full_name, discount_pct, rules)
-                    if not matched:
-                        continue
-                    for rule_id, rule_min in matched:
-                        products.append({
-                            "name": full_name,
-                            "old_price": f"CHF {old_price_val:,.2f}",
-                            "new_price": f"CHF {new_price_val:,.2f}",
-                            "discount": f"-{discount_pct:.0f}%",
-                            "shop": "",
-                            "url": product_url,
-                            "matched_rule_id": rule_id,
-                        })
-                else:
-                    # Legacy single-filter mode
-                    if brand_filter and brand_filter.lower() not in manufacturer.lower():
-                        continue
-                    if discount_pct < min_discount_percent:
-                        continue
-                    products.append({
-                        "name": full_name,
-                        "old_price": f"CHF {old_price_val:,.2f}",
-                        "new_price": f"CHF {new_price_val:,.2f}",
-                        "discount": f"-{discount_pct:.0f}%",
-                        "shop": "",
-                        "url": product_url,
-                        "matched_rule_id": None,
-                    })
-
-                logger.info(
-                    "Found: %s | CHF %.2f -> CHF %.2f (-%d%%)",
-                    full_name, old_price_val, new_price_val, int(discount_pct),
-                )
 
-            except Exception as e:
-                logger.debug("Error parsing card: %s", e)
-                continue
+def _numeric_keys(keys: set[tuple[str, str]] | None) -> set[tuple[str, float | None]]:
+    """Convert (url, "CHF ...") alert keys to (url, float) for cheap per-card checks."""
+    return {(url, _parse_price(price)) for url, price in (keys or ())}
 
-        # Save debug HTML if no results found
-        if not products:
-            try:
-                data_dir = os.environ.get("DATA_DIR", "")
-                debug_path = str(Path(data_dir) / "debug_page.html") if data_dir else "debug_page.html"
-                html = await page.content()
-                with open(debug_path, "w", encoding="utf-8") as f:
-                    f.write(html)
-                logger.info("Saved %s for selector tuning", debug_path)
-            except Exception:
-                pass
-
-        await browser.close()
-
-    logger.info("Scraping complete: %d product(s) found", len(products))
-    return products
 
+def _prepare_rules(rules: list[dict] | None) -> list[tuple[int, str, str, float]]:
+    """Normalize rules once per scrape into (id, rule_type, lowercased value, min_discount)."""
+    return [
+        (r["id"], r["rule_type"], r["value"].lower(), r.get("min_discount_percent", 20))
+        for r in (rules or [])
+    ]
 
-def _match_rules(manufacturer: str, full_name: str,
-                 discount_pct: float, rules: list[dict]) -> list[tuple[int, float]]:
-    """Return list of (rule_id, min_discount) for all matching rules."""
-    matched = []
-    for rule in rules:
-        rule_type = rule["rule_type"]
-        value = rule["value"].lower()
-        min_disc = rule.get("min_discount_percent", 20)
 
+class _RuleMatcher:
+    """Match card text against prepared rules.
+
+    With AHOCORASICK_MIN_RULES or more rules, brand and keyword values are
+    compiled into Aho-Corasick automata so each text is scanned once rather
+    than once per rule; smaller rule sets use the plain _match_rules loop.
+    """
+
+    def __init__(self, prepped: list[tuple[int, str, str, float]]):
+        self.prepped = prepped
+        # No rule can match a discount below the most lenient threshold
+        self.min_discount = min((r[3] for r in prepped), default=float("inf"))
+        self.automata = None
+        if len(prepped) < AHOCORASICK_MIN_RULES:
+            return
+
+        self.automata = {}
+        # An empty value is a substring of everything
+        self.always = set()
+        for idx, (_, rule_type, value, _) in enumerate(prepped):
+            if rule_type not in ("brand", "keyword"):
+                continue
+            if not value:
+                self.always.add(idx)
+                continue
+            automaton = self.automata.setdefault(rule_type, ahocorasick.Automaton())
+            automaton.add_word(value, automaton.get(value, []) + [idx])
+        for automaton in self.automata.values():
+            automaton.make_automaton()
+
+    def match(self, mfg_lc: str, name_lc: str,
+              discount_pct: float) -> list[tuple[int, float]]:
+        """Return (rule_id, min_discount) for all matching rules, in rule order."""
+        if self.automata is None:
+            return _match_rules(mfg_lc, name_lc, discount_pct, self.prepped)
+
+        hits = set(self.always)
+        for rule_type, text in (("brand", mfg_lc), ("keyword", name_lc)):
+            automaton = self.automata.get(rule_type)
+            if automaton is not None:
+                for _, idxs in automaton.iter(text):
+                    hits.update(idxs)
+
+        matched = []
+        for idx in sorted(hits):
+            rule_id, _, _, min_disc = self.prepped[idx]
+            if discount_pct >= min_disc:
+                matched.append((rule_id, min_disc))
+        return matched
+
+
+def _match_rules(mfg_lc: str, name_lc: str, discount_pct: float,
+                 prepped: list[tuple[int, str, str, float]]) -> list[tuple[int, float]]:
+    """Return list of (rule_id, min_discount) for all matching rules.
+
+    `mfg_lc`/`name_lc` must already be lowercased and `prepped` come from
+    _prepare_rules.
+    """
+    matched = []
+    for rule_id, rule_type, value, min_disc in prepped:
         if discount_pct < min_disc:
             continue
 
         if rule_type == "brand":
-            if value in manufacturer.lower():
-                matched.append((rule["id"], min_disc))
+            if value in mfg_lc:
+                matched.append((rule_id, min_disc))
         elif rule_type == "keyword":
-            if value in full_name.lower():
-                matched.append((rule["id"], min_disc))
+            if value in name_lc:
+                matched.append((rule_id, min_disc))
 
     return matched
 
 
 def _parse_price(text: str) -> float | None:
     """Parse a price string like '1,299.00', '3.84', or '189.-' into a float."""
-    cleaned = text.replace("'", "").replace(",", "").replace(" ", "").replace("CHF", "").strip()
-    cleaned = re.sub(r'\.-$', '', cleaned)
+    if _PLAIN_PRICE_RE.fullmatch(text):
+        return float(text)
+    cleaned = text.translate(_PRICE_TRANS).replace("CHF", "")
+    if cleaned.endswith(".-"):
+        cleaned = cleaned[:-2]
     try:
         return float(cleaned)
     except ValueError:
@@ -207,20 +457,24 @@ def _parse_price(text: str) -> float | None:
 PREISPIRAT_RSS_URL = "https://www.preispirat.ch/feed/"
 
 
-async def scrape_preispirat_rss(rules: list[dict] | None = None) -> list[dict]:
-    """Scrape Preispirat.ch RSS feed for deals and match against rules."""
+async def scrape_preispirat_rss(rules: list[dict] | None = None,
+                                skip_keys: set[tuple[str, str]] | None = None) -> list[Product]:
+    """Scrape Preispirat.ch RSS feed for deals and match against rules.
+
+    Entries whose (url, new_price) key is in `skip_keys` are dropped.
+    """
     products = []
 
     # Fetch with SSL workaround (preispirat.ch certificate chain issue)
-    ssl_ctx = ssl.create_default_context()
-    ssl_ctx.check_hostname = False
-    ssl_ctx.verify_mode = ssl.CERT_NONE
-    req = urllib.request.Request(PREISPIRAT_RSS_URL,
-                                headers={"User-Agent": "Mozilla/5.0"})
-    resp = urllib.request.urlopen(req, context=ssl_ctx)
-    feed = feedparser.parse(resp.read())
+    async with httpx.AsyncClient(verify=False, timeout=30, follow_redirects=True,
+                                 headers={"User-Agent": "Mozilla/5.0"}) as client:
+        resp = await client.get(PREISPIRAT_RSS_URL)
+        resp.raise_for_status()
+    feed = feedparser.parse(resp.content)
     logger.info("Preispirat RSS: %d entries", len(feed.entries))
 
+    skip = _numeric_keys(skip_keys)
+    matcher = _RuleMatcher(_prepare_rules(rules))
     for entry in feed.entries:
         title = entry.get("title", "").strip()
         if not title:
@@ -231,7 +485,7 @@ async def scrape_preispirat_rss(rules: list[dict] | None = None) -> list[dict]:
 
         # Extract shop from title: "Product bei ShopName"
         shop = "Preispirat"
-        bei_match = re.search(r'\bbei\s+(.+)$', title, re.IGNORECASE)
+        bei_match = _BEI_RE.search(title)
         if bei_match:
             shop = bei_match.group(1).strip()
 
@@ -239,14 +493,17 @@ async def scrape_preispirat_rss(rules: list[dict] | None = None) -> list[dict]:
         new_price_val = None
         old_price_val = None
 
-        price_match = re.search(r'Preis:\s*CHF\s*([\d\'.,]+(?:-)?)', description)
+        price_match = _PREIS_RE.search(description)
         if price_match:
             new_price_val = _parse_price(price_match.group(1))
 
-        old_price_match = re.search(r'Zweitbester\s+Preis:\s*CHF\s*([\d\'.,]+(?:-)?)', description)
+        old_price_match = _ZWEITBESTER_RE.search(description)
         if old_price_match:
             old_price_val = _parse_price(old_price_match.group(1))
 
+        if (link or title, new_price_val) in skip:
+            continue
+
         # Calculate discount
         discount_pct = 0.0
         if old_price_val and new_price_val and old_price_val > 0:
@@ -254,30 +511,55 @@ async def scrape_preispirat_rss(rules: list[dict] | None = None) -> list[dict]:
 
         # Match against rules
         if rules:
+            if discount_pct < matcher.min_discount:
+                continue
             # Use title as both manufacturer and full_name for matching
-            matched = _match_rules(title, title, discount_pct, rules)
+            title_lc = title.lower()
+            matched = matcher.match(title_lc, title_lc, discount_pct)
             if not matched:
                 continue
             for rule_id, rule_min in matched:
-                products.append({
-                    "name": title,
-                    "old_price": f"CHF {old_price_val:,.2f}" if old_price_val else "",
-                    "new_price": f"CHF {new_price_val:,.2f}" if new_price_val else "",
-                    "discount": f"-{discount_pct:.0f}%" if discount_pct > 0 else "",
-                    "shop": shop,
-                    "url": link,
-                    "matched_rule_id": rule_id,
-                })
+                products.append(Product(
+                    name=title,
+                    old_price=old_price_val,
+                    new_price=new_price_val,
+                    discount_pct=discount_pct,
+                    shop=shop,
+                    url=link,
+                    matched_rule_id=rule_id,
+                ))
         else:
-            products.append({
-                "name": title,
-                "old_price": f"CHF {old_price_val:,.2f}" if old_price_val else "",
-                "new_price": f"CHF {new_price_val:,.2f}" if new_price_val else "",
-                "discount": f"-{discount_pct:.0f}%" if discount_pct > 0 else "",
-                "shop": shop,
-                "url": link,
-                "matched_rule_id": None,
-            })
+            products.append(Product(
+                name=title,
+                old_price=old_price_val,
+                new_price=new_price_val,
+                discount_pct=discount_pct,
+                shop=shop,
+                url=link,
+                matched_rule_id=None,
+            ))
 
     logger.info("Preispirat RSS: %d matching product(s)", len(products))
     return products
+
+
+# --- All sources ---
+
+async def scrape_all(url: str, rules: list[dict] | None = None,
+                     skip_keys: set[tuple[str, str]] | None = None) -> list[Product]:
+    """Scrape toppreise.ch and the Preispirat RSS feed concurrently.
+
+    A failing source is logged and contributes no products.
+    """
+    best, rss = await asyncio.gather(
+        scrape_best_prices(url=url, rules=rules, skip_keys=skip_keys),
+        scrape_preispirat_rss(rules=rules, skip_keys=skip_keys),
+        return_exceptions=True,
+    )
+    if isinstance(best, Exception):
+        logger.error("Scraping failed: %s", best)
+        best = []
+    if isinstance(rss, Exception):
+        logger.warning("Preispirat RSS failed: %s", rss)
+        rss = []
+    return [*best, *rss]